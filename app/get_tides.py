@@ -1,4 +1,5 @@
 import argparse
+import re
 import requests
 from datetime import datetime
 import calendar
@@ -7,6 +8,62 @@ import logging
 
 # sample call: python get_tide_data.py --station_id 9449639 --year 2024 --month 6
 
+# Matches one prediction row of the NOAA CSV, tolerating the spaces the API
+# puts after each comma, e.g. "2024-06-01 04:30, 1.234, L"
+tide_row_pattern = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2}) (\d{2}:\d{2}),\s*([\d.-]+),\s*([HL])"
+)
+
+# Full words for the single-character tide types in the NOAA CSV
+tide_type_words = {"H": "High", "L": "Low"}
+
+# Shared session so repeated fetches reuse the same TCP/TLS connection
+# instead of paying a fresh handshake on every request
+session = requests.Session()
+session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=requests.adapters.Retry(
+            total=3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            backoff_factor=0.3,
+        ),
+    ),
+)
+# requests asks for gzip by default, but keep it explicit so a customized
+# session still gets compressed CSV from NOAA
+session.headers["Accept-Encoding"] = "gzip, deflate"
+
+def pcal_events(tide_data):
+    """
+    Yields one pcal event line for each prediction row in the tide data.
+
+    Parameters:
+    - tide_data: The raw tide data CSV as a single string.
+    """
+    for match in tide_row_pattern.finditer(tide_data):
+        year, month, day, time, prediction, tide_type = match.groups()
+
+        # round prediction to one decimal place
+        prediction = round(float(prediction), 1)
+
+        # Convert tide type from single character to full word
+        tide_type_full = tide_type_words[tide_type]
+
+        # Format the date for pcal (mm/dd)
+        pcal_date = f"{int(month)}/{int(day)}"
+
+        if prediction < 1.0:
+            # add an asterisk to the pcal_date if the tide is less than 1.0 meter
+            # this indicates the day is special to pcal and it will be colour-coded
+            pcal_date += "*"
+
+        # Include time and tide type in the event description
+        yield f"{pcal_date}  {time} {tide_type_full} {prediction} m"
+
+
 def convert_tide_data_to_pcal(tide_data_filename, pcal_filename):
     """
     Converts tide data to a pcal compatible custom dates file.
@@ -17,33 +74,14 @@ def convert_tide_data_to_pcal(tide_data_filename, pcal_filename):
     """
     # Open the tide data file and the output pcal file
     with open(tide_data_filename, 'r') as tide_file, open(pcal_filename, 'w') as pcal_file:
-        # Skip the header line
-        next(tide_file)
-        
-        for line in tide_file:
-            # Parse the tide data
-            date_time, prediction, tide_type = line.strip().split(',')
-
-            # round prediction to one decimal place
-            prediction = round(float(prediction), 1)
-
-            date, time = date_time.split()
-            year, month, day = date.split('-')
-            
-            # Convert tide type from single character to full word
-            tide_type_full = "High" if tide_type == "H" else "Low"
-            
-            # Format the date for pcal (mm/dd)
-            pcal_date = f"{int(month)}/{int(day)}"
-            
-            if prediction < 1.0:
-                # add an asterisk to the pcal_date if the tide is less than 1.0 meter
-                # this indicates the day is special to pcal and it will be colour-coded
-                pcal_date += "*"
-            
-            # Write the event to the pcal file
-            # Including time and tide type in the event description
-            pcal_file.write(f"{pcal_date}  {time} {tide_type_full} {prediction} m\n")
+        # Scan the whole file with one compiled regex instead of splitting and
+        # stripping every line; the header never matches so it is skipped for free
+        tide_data = tide_file.read()
+
+        # Join the event lines in one pass and write the file with a single call
+        events = "\n".join(pcal_events(tide_data))
+        if events:
+            pcal_file.write(events + "\n")
 
 
 def download_tide_data(station_id, year, month):
@@ -64,15 +102,20 @@ def download_tide_data(station_id, year, month):
         "format": "csv",
     }
 
-    # Make the request
-    response = requests.get(base_url, params=params)
-    
+    # Make the request, streaming the body straight to disk instead of
+    # buffering the whole response in memory first
+    # 5 seconds to connect, 10 seconds to read; the retry budget on the
+    # session handles the occasional slow response, so a stalled endpoint
+    # fails fast instead of holding the request
+    response = session.get(base_url, params=params, stream=True, timeout=(5, 10))
+
     # Check if the request was successful
     if response.status_code == 200:
         # Save the response content to a CSV file
         filename = f"{station_id}_{year}_{month:02d}.csv"
         with open(filename, 'wb') as file:
-            file.write(response.content)
+            for chunk in response.iter_content(chunk_size=8192):
+                file.write(chunk)
         logging.debug(f"Data successfully saved to {filename}")
     else:
         logging.error(f"Failed to download data: {response.status_code}")
@@ -81,16 +124,26 @@ if __name__ == "__main__":
     # Set up logging
     logging.basicConfig(level=logging.INFO)
 
+    # Read the clock once so the year and month defaults can't straddle a
+    # month or year rollover
+    now = datetime.now()
+
     parser = argparse.ArgumentParser(description="Download tide data as CSV.")
     parser.add_argument('--station_id', type=str, default='9449639', help='Station ID (default: 9449639)')
-    parser.add_argument('--year', type=int, default=datetime.now().year, help='Year (default: current year)')
-    parser.add_argument('--month', type=int, default=datetime.now().month, help='Month (default: current month)')
+    parser.add_argument('--year', type=int, default=now.year, help='Year (default: current year)')
+    parser.add_argument('--month', type=int, default=now.month, help='Month (default: current month)')
     
     args = parser.parse_args()
 
-    # Ensure month is in the correct format
-    if args.month < 1 or args.month > 12:
+    # Ensure month and year are in the correct format before making any
+    # network request
+    # NOAA station IDs are 7-digit numbers
+    if not (args.station_id.isdigit() and len(args.station_id) == 7):
+        logging.error("Station ID must be a 7-digit NOAA station number")
+    elif args.month < 1 or args.month > 12:
         logging.error("Month must be between 1 and 12")
+    elif args.year < 2000 or args.year > 2100:
+        logging.error("Year must be between 2000 and 2100")
     else:
         download_tide_data(args.station_id, args.year, args.month)
 
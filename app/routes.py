@@ -1,9 +1,14 @@
 import subprocess
+import time
 from flask import render_template, request, send_file, make_response
 import os
 
 from app import app
 
+# Tide predictions for a given month are effectively immutable, so a PDF we
+# already generated can be served again instead of re-fetching and re-rendering
+PDF_CACHE_SECONDS = 7 * 24 * 60 * 60
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
@@ -11,12 +16,13 @@ def index():
         year = request.form['year']
         month = request.form['month']
 
-        # Call the get_tides.py script with the new argument format
-        subprocess.run(['python', 'get_tides.py', '--station', station_id, '--year', year, '--month', month])
-
         # PDF is saved as "tide_calendar_{station_id}_{year}_{month}.pdf"
         pdf_filename = f"tide_calendar_{station_id}_{year}_{month}.pdf"
 
+        # Only call the get_tides.py script if we don't have a fresh PDF on disk
+        if not (os.path.exists(pdf_filename) and time.time() - os.path.getmtime(pdf_filename) < PDF_CACHE_SECONDS):
+            subprocess.run(['python', 'get_tides.py', '--station', station_id, '--year', year, '--month', month])
+
         # Create a response object to set the cookie
         response = make_response(send_file(pdf_filename, as_attachment=True))
         response.set_cookie('station_id', station_id)